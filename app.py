@@ -1,8 +1,8 @@
 import streamlit as st
-import json
+import io
 import os
 from dotenv import load_dotenv
-from legal_agent import LegalAgent
+from legal_agent import LegalAgent, dump_json
 
 # Load environment variables (API Key)
 load_dotenv()
@@ -14,6 +14,18 @@ st.set_page_config(
 )
 
 
+@st.cache_resource(show_spinner=False)
+def get_agent(api_key: str) -> LegalAgent:
+    """One LegalAgent (with its own Gemini client) per API key, reused across reruns and sessions."""
+    return LegalAgent(api_key)
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def cached_extract(_agent: LegalAgent, pdf_bytes: bytes) -> str:
+    """Extracted text per uploaded file's contents, so reruns don't re-parse the same PDF."""
+    return _agent.extract_text_from_pdf(io.BytesIO(pdf_bytes))
+
+
 @st.dialog("System Architecture", width="large")
 def show_architecture_modal():
     image_path = "architecture.png"
@@ -42,6 +54,12 @@ with st.sidebar:
     if not api_key:
         st.warning("⚠️ API Key required to proceed.")
         st.stop()
+
+    previous_key = st.session_state.get("api_key")
+    if previous_key is not None and previous_key != api_key:
+        # This session switched keys: drop only the agent built for its old key.
+        get_agent.clear(previous_key)
+    st.session_state["api_key"] = api_key
     
     st.success("API Key Loaded")
     st.markdown("---")
@@ -54,75 +72,56 @@ with st.sidebar:
     st.markdown("---")
     st.info("Built for NIYAMR Internship Assignment")
 
-st.markdown("### 📂 Document Upload")
-st.write("Please upload the **Universal Credit Act 2025 (PDF)** to begin analysis.")
-
-uploaded_file = st.file_uploader("Upload Act PDF", type=['pdf'], help="Limit 200MB per file")
+def create_result_tabs() -> list:
+    """Builds the result tabs up front and returns one placeholder per tab, filled in later."""
+    slots = []
+    for tab in st.tabs(["📄 Executive Summary", "🔍 Key Sections", "✅ Rule Validation", "💾 Raw JSON"]):
+        with tab:
+            slots.append(st.empty())
+    return slots
 
-if st.button("🚀 Analyze Document", type="primary"):
-    if not uploaded_file:
-        st.error("❌ Please upload a PDF document first.")
-        st.stop()
 
-    agent = LegalAgent(api_key)
-    
-    with st.status("Processing Document...", expanded=True) as status:
-        
-        st.write("📄 Extracting text from PDF...")
-        try:
-            with open("temp.pdf", "wb") as f:
-                f.write(uploaded_file.getbuffer())
-            
-            text = agent.extract_text_from_pdf("temp.pdf")
-            
-            if len(text) < 100:
-                st.warning("⚠️ Warning: Extracted text is very short.")
-            else:
-                st.write(f"✅ Text extracted successfully ({len(text)} characters).")
+def render_summary(results: dict):
+    st.header("Executive Summary (Task 2)")
+    summary = results.get("summary")
+    if not isinstance(summary, list):
+        st.info("No summary available.")
+        return
+    for point in summary:
+        st.markdown(f"• {point}")
 
-            st.write("🧠 Sending to AI for analysis (Tasks 2, 3 & 4)...")
-            results = agent.analyze_document(text)
 
-            if "error" in results:
-                status.update(label="Analysis Failed", state="error")
-                st.error(results["error"])
-                st.stop()
-            else:
-                status.update(label="Analysis Complete!", state="complete")
+def analyze_live(agent: LegalAgent, text: str, summary_slot) -> dict:
+    """Streams the analysis, redrawing the summary tab as bullet points arrive."""
+    results = {}
+    for results in agent.analyze_document_stream(text):
+        with summary_slot.container():
+            render_summary(results)
+    return results
 
-        except Exception as e:
-            status.update(label="System Error", state="error")
-            st.error(f"An error occurred: {e}")
-            st.stop()
-        finally:
-            if os.path.exists("temp.pdf"):
-                os.remove("temp.pdf")
 
-    st.divider()
-    
-    tab1, tab2, tab3, tab4 = st.tabs(["📄 Executive Summary", "🔍 Key Sections", "✅ Rule Validation", "💾 Raw JSON"])
+def render_results(results: dict, report_name: str = "universal_credit", slots: list = None):
+    tab1, tab2, tab3, tab4 = (slot.container() for slot in slots or create_result_tabs())
     
     with tab1:
-        st.header("Executive Summary (Task 2)")
-        if "summary" in results and isinstance(results["summary"], list):
-            for point in results["summary"]:
-                st.markdown(f"• {point}")
-        else:
-            st.info("No summary available.")
+        render_summary(results)
     
     with tab2:
         st.header("Legislative Sections (Task 3)")
-        sections = results.get("sections", {})
-        for key, value in sections.items():
+        for key, value in results["sections"].items():
             with st.expander(f"📌 {key.title().replace('_', ' ')}"):
                 st.markdown(value)
 
     with tab3:
         st.subheader("📋 Compliance Rule Validation (Task 4)")
         
-        rules = results.get("rules_analysis", [])
-        total_rules = len(rules)
-        pass_count = sum(1 for r in rules if r.get('status', '').lower() == 'pass')
+        # Results are schema-validated by LegalAgent, so fields can be read directly.
+        parsed = [
+            (rule['status'] == 'pass', rule['rule'], rule['confidence'], rule['evidence'])
+            for rule in results["rules_analysis"]
+        ]
+        total_rules = len(parsed)
+        pass_count = sum(1 for is_pass, *_ in parsed if is_pass)
         
         score_col1, score_col2 = st.columns([1, 4])
         with score_col1:
@@ -138,12 +137,8 @@ if st.button("🚀 Analyze Document", type="primary"):
         
         st.markdown("---")
         
-        for rule in rules:
-            status = rule.get('status', 'fail').lower()
-            is_pass = status == 'pass'
-            
+        for is_pass, rule_text, confidence, evidence in parsed:
             icon = "✅" if is_pass else "⚠️"
-            rule_text = rule.get('rule', 'Unknown Rule')
             
             with st.expander(f"{icon} {rule_text}", expanded=not is_pass):
                 c1, c2 = st.columns([1, 2])
@@ -153,20 +148,88 @@ if st.button("🚀 Analyze Document", type="primary"):
                         st.success("PASS")
                     else:
                         st.error("FAIL - Attention Needed")     
-                    st.markdown(f"**AI Confidence:** `{rule.get('confidence', 0)}%`")
+                    st.markdown(f"**AI Confidence:** `{confidence}%`")
                 with c2:
                     st.markdown("**🕵️ Evidence Extracted:**")
-                    evidence = rule.get('evidence', 'No specific evidence found in text.')
                     st.info(evidence)
 
     with tab4:
         st.header("JSON Output")
         st.json(results)
         
-        json_str = json.dumps(results, indent=2)
         st.download_button(
             label="📥 Download Final JSON Report",
-            data=json_str,
-            file_name="universal_credit_analysis.json",
-            mime="application/json"
-        )
\ No newline at end of file
+            data=dump_json(results),
+            file_name=f"{report_name}_analysis.json",
+            mime="application/json",
+            key=f"download_{report_name}",
+        )
+
+
+st.markdown("### 📂 Document Upload")
+st.write("Please upload the **Universal Credit Act 2025 (PDF)** to begin analysis.")
+
+uploaded_files = st.file_uploader(
+    "Upload Act PDF", type=['pdf'], accept_multiple_files=True,
+    help="Limit 200MB per file. Upload several Acts to analyze them in one batch."
+)
+
+if st.button("🚀 Analyze Document", type="primary"):
+    if not uploaded_files:
+        st.error("❌ Please upload a PDF document first.")
+        st.stop()
+
+    agent = get_agent(api_key)
+    
+    # Not used as a context manager: leaving the block would mark the status complete
+    # while the analysis is still streaming into the tabs below it.
+    status = st.status("Processing Document...", expanded=True)
+    results_area = st.empty()
+
+    status.write("📄 Extracting text from PDF...")
+    try:
+        texts = []
+        for uploaded_file in uploaded_files:
+            text = cached_extract(agent, bytes(uploaded_file.getbuffer()))
+            texts.append(text)
+        
+            if len(text) < 100:
+                status.warning(f"⚠️ Warning: Extracted text of {uploaded_file.name} is very short.")
+            else:
+                status.write(f"✅ Text extracted from {uploaded_file.name} ({len(text)} characters).")
+
+        if len(texts) == 1:
+            status.write("🧠 Sending to AI for analysis (Tasks 2, 3 & 4)...")
+            with results_area.container():
+                st.divider()
+                # Lay out the result tabs first, then fill them while Gemini generates.
+                slots = create_result_tabs()
+            all_results = [analyze_live(agent, texts[0], slots[0])]
+        else:
+            status.write(f"🧠 Sending {len(texts)} documents to AI in one batch (Tasks 2, 3 & 4)...")
+            all_results = agent.analyze_documents(texts)
+
+    except Exception as e:
+        status.update(label="System Error", state="error")
+        status.error(f"An error occurred: {e}")
+        st.stop()
+
+    if len(texts) == 1 and "error" in all_results[0]:
+        results_area.empty()
+        status.update(label="Analysis Failed", state="error")
+        status.error(all_results[0]["error"])
+        st.stop()
+
+    status.update(label="Analysis Complete!", state="complete")
+
+    if len(texts) == 1:
+        render_results(all_results[0], slots=slots)
+    else:
+        with results_area.container():
+            st.divider()
+            for uploaded_file, results in zip(uploaded_files, all_results):
+                st.markdown(f"## 📑 {uploaded_file.name}")
+                if "error" in results:
+                    st.error(results["error"])
+                else:
+                    render_results(results, report_name=os.path.splitext(uploaded_file.name)[0])
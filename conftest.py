@@ -0,0 +1,2 @@
+# test_local.py is a manual end-to-end script that needs a live API key, not a pytest module.
+collect_ignore = ["test_local.py"]
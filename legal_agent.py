@@ -1,129 +1,614 @@
+import io
 import os
+import functools
 import json
 import re
-from typing import Dict, List, Optional
+import time
+import hashlib
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Union
 import google.generativeai as genai
+from google.ai import generativelanguage as glm
+import fastjsonschema
 from pypdf import PdfReader
 
+try:
+    import orjson
+except ImportError:  # optional: faster JSON parsing/serialization
+    orjson = None
+
 
 API_KEY = os.environ.get("GEMINI_API_KEY", "") 
 
+# Anything PdfReader accepts: a filesystem path or a binary file-like object.
+PdfSource = Union[str, os.PathLike, BinaryIO]
+
+# Static task/rule instructions, sent as the system instruction ahead of the document text.
+ANALYSIS_INSTRUCTIONS = """
+You are a legal AI agent analyzing a UK Act of Parliament.
+The user will send the DOCUMENT TEXT of the Act.
+
+PERFORM THE FOLLOWING TASKS AND RETURN ONLY RAW JSON.
+
+TASK 2: SUMMARIZE
+Summarize the entire Act in 5-10 bullet points focusing on: Purpose, Key definitions, Eligibility, Obligations, Enforcement elements.
+
+TASK 3: EXTRACT SECTIONS
+Extract exact text or summary for: definitions, obligations, responsibilities, eligibility, payments, penalties, record_keeping.
+
+TASK 4: RULE CHECKS
+Check these 6 rules. Return status (pass/fail), evidence, and confidence (0-100).
+1. Act must define key terms
+2. Act must specify eligibility criteria
+3. Act must specify responsibilities of the administering authority
+4. Act must include enforcement or penalties
+5. Act must include payment calculation or entitlement structure
+6. Act must include record-keeping or reporting requirements
+
+---
+REQUIRED JSON OUTPUT FORMAT:
+{
+    "summary": ["point 1", "point 2"...],
+    "sections": {
+        "definitions": "...",
+        "obligations": "...",
+        "responsibilities": "...",
+        "eligibility": "...",
+        "payments": "...",
+        "penalties": "...",
+        "record_keeping": "..."
+    },
+    "rules_analysis": [
+        {
+            "rule": "Act must define key terms",
+            "status": "pass",
+            "evidence": "Section X mentions...",
+            "confidence": 100
+        },
+        ... (repeat for all 6 rules)
+    ]
+}
+"""
+
+# Below this many pages, process-pool startup costs more than it saves.
+PARALLEL_MIN_PAGES = 8
+
+# Batched analysis: documents per Gemini call. The cap keeps the combined multi-KB
+# JSON results inside the model's output-token limit; the input side (at most
+# PROMPT_BUDGET_TOKENS per document) stays far inside the context window.
+BATCH_MAX_DOCS = 4
+
+# Rough characters-per-token ratio used to size prompts without a count_tokens round trip.
+CHARS_PER_TOKEN = 4
+
+# Tokens of document text sent per analysis; see LegalAgent._select_relevant.
+PROMPT_BUDGET_TOKENS = 8000
+
+# Start of a section heading: "PART 2", "Section 2 SCHEDULE 1", or a numbered section
+# such as "14 Claimant commitment". Case-sensitive, so in-text cross-references that
+# happen to start a line ("section 4(6)(c) of ...") are not taken for headings.
+_SECTION_HEADER_RE = re.compile(
+    r'^[^\S\n]*(?:(?:Section[^\S\n]+\d+[A-Z]?[^\S\n]+)?(?:PART|SCHEDULE)[^\S\n]+\d+\b'
+    r'|\d{1,3}[A-Z]?[^\S\n]+[A-Z])',
+    re.MULTILINE,
+)
+
+# The table of contents, from its "CONTENTS" heading up to the long title ("An Act to ...").
+_CONTENTS_RE = re.compile(
+    r'^[^\S\n]*CONTENTS[^\S\n]*\n.*?(?=^[^\S\n]*An Act to\b)',
+    re.MULTILINE | re.DOTALL,
+)
+
+# Vocabulary of the sections and rules the analysis asks about.
+_TOPIC_KEYWORDS_RE = re.compile(
+    r'\b(?:defin|mean|eligib|entitle|conditions?\b|oblig|dut(?:y|ies)|must\b|responsib|'
+    r'Secretary of State|payment|amount|calculat|rate\b|penalt|offence|enforce|sanction|'
+    r'record|report|information)',
+    re.IGNORECASE,
+)
+
+# Running header of UK Act PDFs, e.g. "Universal Credit Act 2025 (c. 22)".
+_HEADER_RE = re.compile(r'.*Act \d{4}\s+\(c\.\s*\d+\)')
+
+# Characters for which str.isdigit() is true: \d plus the superscript, subscript
+# and circled digits that \d does not match (e.g. a lone "²" footnote marker).
+_DIGIT_CLASS = (
+    r'[\d\u00b2\u00b3\u00b9\u1369-\u1371\u19da\u2070\u2074-\u2079\u2080-\u2089'
+    r'\u2460-\u2468\u2474-\u247c\u2488-\u2490\u24ea\u24f5-\u24fd\u24ff\u2776-\u277e'
+    r'\u2780-\u2788\u278a-\u2792\U00010a40-\U00010a43\U00010e60-\U00010e68'
+    r'\U00011052-\U0001105a\U0001f100-\U0001f10a]'
+)
+
+# A whole line (newline included) that is blank, a bare page number, or a
+# Crown copyright / Stationery Office footer.
+_NOISE_LINE_RE = re.compile(
+    r'^[^\S\n]*(?:' + _DIGIT_CLASS + r'+|.*?(?:Crown copyright|Stationery Office).*)?[^\S\n]*(?:\n|\Z)',
+    re.MULTILINE,
+)
+
+# Body of a Markdown code fence (```json ... ```), tolerating a missing closing fence.
+_FENCE_RE = re.compile(r'```(?:json)?\s*(.*?)\s*(?:```|\Z)', re.DOTALL)
+
+# Shape of an analysis result, as described in ANALYSIS_INSTRUCTIONS.
+RESULT_SCHEMA = {
+    "type": "object",
+    "required": ["summary", "sections", "rules_analysis"],
+    "properties": {
+        "summary": {"type": "array", "minItems": 1, "items": {"type": "string"}},
+        "sections": {
+            "type": "object",
+            "required": [
+                "definitions", "obligations", "responsibilities", "eligibility",
+                "payments", "penalties", "record_keeping",
+            ],
+            "additionalProperties": {"type": "string"},
+        },
+        "rules_analysis": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "required": ["rule", "status", "evidence", "confidence"],
+                "properties": {
+                    "rule": {"type": "string"},
+                    "status": {"enum": ["pass", "fail"]},
+                    "evidence": {"type": "string"},
+                    "confidence": {"type": "number", "minimum": 0, "maximum": 100},
+                },
+            },
+        },
+    },
+}
+
+_VALIDATE = fastjsonschema.compile(RESULT_SCHEMA)
+
+class ResponseCache:
+    """
+    Local SQLite store of analysis results, so re-uploading the same Act skips the Gemini call.
+    Keys are a sha256 of the namespace plus the whitespace/case-normalized text, which also
+    catches near-identical re-extractions of the same document. The namespace identifies
+    how results were produced, so changing the prompt or model invalidates old entries.
+    """
+
+    def __init__(self, path: str, ttl_seconds: int = 86400, namespace: str = ""):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.namespace = namespace
+        with closing(sqlite3.connect(self.path)) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, response TEXT NOT NULL, created_at INTEGER NOT NULL)"
+            )
+
+    def make_key(self, text: str) -> str:
+        normalized = " ".join(text.split()).casefold()
+        return hashlib.sha256(f"{self.namespace}\0{normalized}".encode("utf-8")).hexdigest()
+
+    def get(self, text: str) -> Optional[Dict]:
+        cutoff = int(time.time()) - self.ttl_seconds
+        # A fresh connection per call keeps the cache safe to share across Streamlit threads.
+        with closing(sqlite3.connect(self.path)) as conn:
+            row = conn.execute(
+                "SELECT response FROM cache WHERE key = ? AND created_at > ?",
+                (self.make_key(text), cutoff),
+            ).fetchone()
+        return _json_loads(row[0]) if row else None
+
+    def put(self, text: str, result: Dict) -> None:
+        with closing(sqlite3.connect(self.path)) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (key, response, created_at) VALUES (?, ?, ?)",
+                (self.make_key(text), json.dumps(result), int(time.time())),
+            )
+
+
 class LegalAgent:
-    def __init__(self, api_key: str):
+    MODEL_NAME = 'models/gemini-2.5-flash-preview-09-2025'
+
+    def __init__(self, api_key: str, cache_path: str = ".cache.db", no_cache: bool = False):
         if not api_key:
             raise ValueError("API Key is required")
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-2.5-flash-preview-09-2025')
+        self.api_key = api_key
+        self.model = _keyed_model(api_key)
+        self.response_cache = None if no_cache else ResponseCache(cache_path, namespace=self._cache_namespace())
 
-    def extract_text_from_pdf(self, pdf_path: str) -> str:
+    def extract_text_from_pdf(
+        self,
+        source: PdfSource,
+        max_workers: Optional[int] = None,
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+    ) -> str:
         """
         Task 1: Extract text from PDF.
         Includes cleaning steps to ensure "clean and structured" output.
+        source is a file path or a binary file-like object (e.g. io.BytesIO).
+        Pages are extracted in a process pool for long documents; progress_callback,
+        if given, is called as progress_callback(pages_done, total_pages).
+        Paths without a progress_callback are memoized on a hash of the file's contents.
         """
         try:
-            reader = PdfReader(pdf_path)
-            full_text = []
-            
-            for page in reader.pages:
-                text = page.extract_text()
-                if text:
-                    clean_page = self._clean_text(text)
-                    full_text.append(clean_page)
-            
-            return "\n\n".join(full_text)
+            if isinstance(source, (str, os.PathLike)) and progress_callback is None:
+                return _extract_cached(os.fspath(source), _file_digest(source), max_workers)
+            return self._extract_text(source, max_workers, progress_callback)
         except Exception as e:
             raise Exception(f"Error reading PDF: {e}")
 
-    def _clean_text(self, text: str) -> str:
+    @staticmethod
+    def _extract_text(
+        source: PdfSource,
+        max_workers: Optional[int],
+        progress_callback: Optional[Callable[[int, int], None]],
+    ) -> str:
+        reader = PdfReader(source)
+        num_pages = len(reader.pages)
+        pages = range(num_pages)
+
+        if num_pages < PARALLEL_MIN_PAGES:
+            page_texts = (_clean_page(page) for page in reader.pages)
+            return LegalAgent._collect_pages(page_texts, num_pages, progress_callback)
+
+        if not isinstance(source, (str, os.PathLike)):
+            # Workers can't share the stream, so ship its bytes to each one once.
+            source.seek(0)
+            source = source.read()
+        workers = max_workers or min(os.cpu_count() or 1, 8)
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(source,)
+        ) as ex:
+            page_texts = ex.map(_extract_page, pages, chunksize=4)
+            return LegalAgent._collect_pages(page_texts, num_pages, progress_callback)
+
+    @staticmethod
+    def _collect_pages(
+        page_texts: Iterable[Optional[str]],
+        total: int,
+        progress_callback: Optional[Callable[[int, int], None]],
+    ) -> str:
+        """
+        Joins cleaned pages in order with blank lines, skipping empty ones and reporting progress.
+        """
+        full_text = []
+        for done, clean_page in enumerate(page_texts, 1):
+            if clean_page is not None:
+                full_text.append(clean_page)
+            if progress_callback:
+                progress_callback(done, total)
+        return "\n\n".join(full_text)
+
+    @staticmethod
+    def _clean_text(text: str) -> str:
         """
         Task 1 Requirement: 'The extracted text must be clean and structured.'
         Generalizes cleaning for UK Legislation style PDFs (removing recurring headers/footers).
         """
         
-        text = re.sub(r'.*Act \d{4}\s+\(c\.\s*\d+\)', '', text)
-        
-        lines = text.split('\n')
-        cleaned_lines = []
-        for line in lines:
-            stripped = line.strip()
-            if not stripped:
-                continue
-            if stripped.isdigit(): 
-                continue
-            if "Crown copyright" in stripped or "Stationery Office" in stripped:
-                continue
-                
-            cleaned_lines.append(line)
-        
-        text = "\n".join(cleaned_lines)
+        text = _HEADER_RE.sub('', text)
         
-        text = re.sub(r'\n\s*\n', '\n\n', text)
+        # Drop blank lines, bare page numbers and copyright footers in one regex pass
+        # rather than stripping and testing every line in Python. No blank lines
+        # survive this, so no separate blank-line collapsing pass is needed.
+        text = _NOISE_LINE_RE.sub('', text)
+        if text.endswith('\n'):
+            text = text[:-1]
         
         return text
 
     def analyze_document(self, text: str) -> Dict:
         """Runs Tasks 2, 3, and 4 in a single efficient pipeline."""
         
-        prompt = f"""
-        You are a legal AI agent analyzing a UK Act of Parliament.
-        
-        DOCUMENT TEXT:
-        {text[:30000]} 
-        
-        ---
-        PERFORM THE FOLLOWING TASKS AND RETURN ONLY RAW JSON.
-        
-        TASK 2: SUMMARIZE
-        Summarize the entire Act in 5-10 bullet points focusing on: Purpose, Key definitions, Eligibility, Obligations, Enforcement elements.
-        
-        TASK 3: EXTRACT SECTIONS
-        Extract exact text or summary for: definitions, obligations, responsibilities, eligibility, payments, penalties, record_keeping.
-        
-        TASK 4: RULE CHECKS
-        Check these 6 rules. Return status (pass/fail), evidence, and confidence (0-100).
-        1. Act must define key terms
-        2. Act must specify eligibility criteria
-        3. Act must specify responsibilities of the administering authority
-        4. Act must include enforcement or penalties
-        5. Act must include payment calculation or entitlement structure
-        6. Act must include record-keeping or reporting requirements
-        
-        ---
-        REQUIRED JSON OUTPUT FORMAT:
-        {{
-            "summary": ["point 1", "point 2"...],
-            "sections": {{
-                "definitions": "...",
-                "obligations": "...",
-                "responsibilities": "...",
-                "eligibility": "...",
-                "payments": "...",
-                "penalties": "...",
-                "record_keeping": "..."
-            }},
-            "rules_analysis": [
-                {{
-                    "rule": "Act must define key terms",
-                    "status": "pass",
-                    "evidence": "Section X mentions...",
-                    "confidence": 100
-                }},
-                ... (repeat for all 6 rules)
-            ]
-        }}
-        """
+        cached = self._cached_result(text)
+        if cached is not None:
+            return cached
 
         try:
-            response = self.model.generate_content(prompt)
-            json_str = self._clean_json_string(response.text)
-            return json.loads(json_str)
+            response = self.model.generate_content(self._build_prompt(text))
+            return self._finish_analysis(text, response.text)
         except Exception as e:
             return {"error": f"Analysis failed: {str(e)}"}
 
+    def analyze_document_stream(self, text: str) -> Iterator[Dict]:
+        """
+        Streaming variant of analyze_document.
+        Yields best-effort partial results as Gemini generates them; the last item
+        yielded is always the complete result (or an error dict).
+        """
+        cached = self._cached_result(text)
+        if cached is not None:
+            yield cached
+            return
+
+        chunks = []
+        try:
+            for chunk in self.model.generate_content(self._build_prompt(text), stream=True):
+                chunks.append(chunk.text)
+                partial = _parse_partial_json("".join(chunks))
+                if partial:
+                    yield partial
+        except Exception:
+            # Streaming is an optimisation only; fall back to a single blocking call.
+            yield self.analyze_document(text)
+            return
+
+        try:
+            yield self._finish_analysis(text, "".join(chunks))
+        except Exception as e:
+            yield {"error": f"Analysis failed: {str(e)}"}
+
+    def analyze_documents(self, texts: List[str]) -> List[Dict]:
+        """
+        Batch variant of analyze_document: packs up to BATCH_MAX_DOCS documents into
+        each Gemini call, so the instructions and request overhead are
+        paid once per batch. Returns one result per input, in order; a document that
+        could not be analyzed gets an {"error": ...} dict, as in analyze_document.
+        """
+        results: List[Optional[Dict]] = [self._cached_result(text) for text in texts]
+        pending = [i for i, result in enumerate(results) if result is None]
+
+        for start in range(0, len(pending), BATCH_MAX_DOCS):
+            batch = pending[start:start + BATCH_MAX_DOCS]
+            for i, result in zip(batch, self._analyze_batch([texts[i] for i in batch])):
+                results[i] = result
+
+        return results
+
+    def _analyze_batch(self, texts: List[str]) -> List[Dict]:
+        """
+        Runs one Gemini call over numbered DOCUMENT blocks and splits the JSON array back out.
+        Each document gets the same text budget as a single analysis, so the results can
+        share the response cache. If the batch response can't be used, each document is
+        analyzed on its own instead.
+        """
+        documents = "\n\n".join(
+            f"DOCUMENT {n}:\n{self._select_relevant(text)}" for n, text in enumerate(texts, 1)
+        )
+        prompt = (
+            f"The user turn contains {len(texts)} separate documents. Perform the tasks on each "
+            "one independently and return a JSON array with one object per document below, "
+            "in the same order, each in the REQUIRED JSON OUTPUT FORMAT.\n\n" + documents
+        )
+
+        try:
+            response = self.model.generate_content(prompt)
+            parsed = _json_loads(self._clean_json_string(response.text))
+        except Exception:
+            parsed = None
+
+        if not isinstance(parsed, list) or len(parsed) != len(texts):
+            return [self.analyze_document(text) for text in texts]
+
+        results = []
+        for text, item in zip(texts, parsed):
+            try:
+                result = self._parse_validated(json.dumps(item))
+            except Exception:
+                results.append(self.analyze_document(text))
+                continue
+            if self.response_cache:
+                self.response_cache.put(text, result)
+            results.append(result)
+        return results
+
+    def _build_prompt(self, text: str) -> str:
+        # The static instructions travel as the system instruction,
+        # so only the document itself is sent as the user turn.
+        return f"DOCUMENT TEXT:\n{self._select_relevant(text)}"
+
+    @staticmethod
+    def _select_relevant(text: str, budget_tokens: int = PROMPT_BUDGET_TOKENS) -> str:
+        """
+        Fits the document into a token budget by keeping the sections most relevant to
+        the tasks (scored by keyword count), in document order, rather than cutting it
+        off at a fixed length. The table of contents is skipped, and the opening (long
+        title, purpose) is always kept, truncated if it alone exceeds the budget.
+        Falls back to a plain slice when no section structure is found.
+        """
+        budget = budget_tokens * CHARS_PER_TOKEN
+        if len(text) <= budget:
+            return text
+
+        text = _CONTENTS_RE.sub('', text, count=1)
+        if len(text) <= budget:
+            return text
+
+        starts = [m.start() for m in _SECTION_HEADER_RE.finditer(text)]
+        if len(starts) < 2:
+            return text[:budget]
+
+        bounds = [0] + [s for s in starts if s > 0] + [len(text)]
+        sections = [text[bounds[i]:bounds[i + 1]].strip("\n") for i in range(len(bounds) - 1)]
+
+        separator = "\n\n"
+        chosen = {0: sections[0][:budget]}
+        used = len(chosen[0])
+        ranked = sorted(
+            range(1, len(sections)),
+            key=lambda i: len(_TOPIC_KEYWORDS_RE.findall(sections[i])),
+            reverse=True,
+        )
+        for i in ranked:
+            cost = len(sections[i]) + len(separator)
+            if used + cost <= budget:
+                chosen[i] = sections[i]
+                used += cost
+
+        return separator.join(chosen[i] for i in sorted(chosen) if chosen[i])
+
+    @classmethod
+    def _cache_namespace(cls) -> str:
+        """Hash of the model, instructions, schema and prompt budget: everything but the document that shapes a result."""
+        parts = (cls.MODEL_NAME, ANALYSIS_INSTRUCTIONS, json.dumps(RESULT_SCHEMA), str(PROMPT_BUDGET_TOKENS))
+        return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+    def _cached_result(self, text: str) -> Optional[Dict]:
+        if not self.response_cache:
+            return None
+        cached = self.response_cache.get(text)
+        if cached is None:
+            return None
+        try:
+            return _validate(cached)
+        except fastjsonschema.JsonSchemaException:
+            return None  # stored before validation existed; treat as a miss
+
+    def _parse_validated(self, raw: str) -> Dict:
+        """
+        Parses the model's JSON and checks it against RESULT_SCHEMA.
+        On failure the model is asked once to repair its output; a second failure raises.
+        """
+        try:
+            return _validate(_json_loads(self._clean_json_string(raw)))
+        except ValueError as e:  # malformed JSON, or JsonSchemaException (a ValueError)
+            response = self.model.generate_content(_repair_prompt(raw, e))
+            return _validate(_json_loads(self._clean_json_string(response.text)))
+
+    def _finish_analysis(self, text: str, raw: str) -> Dict:
+        """Parses and validates the model's raw output and stores the result in the response cache."""
+        result = self._parse_validated(raw)
+        if self.response_cache:
+            self.response_cache.put(text, result)
+        return result
+
     def _clean_json_string(self, json_str: str) -> str:
         """Helper to extract valid JSON from Markdown code blocks."""
-        if "```json" in json_str:
-            json_str = json_str.split("```json")[1].split("```")[0]
-        elif "```" in json_str:
-            json_str = json_str.split("```")[1].split("```")[0]
-        return json_str.strip()
\ No newline at end of file
+        match = _FENCE_RE.search(json_str)
+        return (match.group(1) if match else json_str).strip()
+
+
+def _keyed_model(api_key: str) -> genai.GenerativeModel:
+    """
+    A GenerativeModel that always calls Gemini with api_key.
+    genai.configure() only sets one process-wide client, which would make agents for
+    different keys share credentials. The SDK has no public per-model key, so this
+    relies on GenerativeModel._client, the client a model creates lazily on its first call.
+    """
+    model = genai.GenerativeModel(LegalAgent.MODEL_NAME, system_instruction=ANALYSIS_INSTRUCTIONS)
+    model._client = glm.GenerativeServiceClient(client_options={"api_key": api_key})
+    return model
+
+
+def _file_digest(path: Union[str, os.PathLike]) -> bytes:
+    """BLAKE2b digest of a file's contents; much cheaper than SHA-256 on large PDFs."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.digest()
+
+
+@functools.lru_cache(maxsize=8)
+def _extract_cached(path: str, digest: bytes, max_workers: Optional[int]) -> str:
+    """Memoized extraction of a PDF on disk; digest is part of the key so edited files are re-read."""
+    return LegalAgent._extract_text(path, max_workers, None)
+
+
+# PdfReader of the document being extracted, set in each pool worker by _init_worker.
+_worker_reader: Optional[PdfReader] = None
+
+
+def _init_worker(source: Union[str, os.PathLike, bytes]) -> None:
+    """Pool initializer: pypdf objects don't pickle, so each worker opens the PDF itself."""
+    global _worker_reader
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    _worker_reader = PdfReader(source)
+
+
+def _json_loads(s: str):
+    return orjson.loads(s) if orjson else json.loads(s)
+
+
+def dump_json(data) -> bytes:
+    """Serializes data as indented UTF-8 JSON, via orjson when it is installed."""
+    if orjson:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    return json.dumps(data, indent=2).encode("utf-8")
+
+
+def _validate(data) -> Dict:
+    """
+    Checks data against RESULT_SCHEMA after normalizing harmless variations the
+    model produces ("Pass" for "pass", "90" for 90), so they don't cost a repair call.
+    """
+    rules = data.get("rules_analysis") if isinstance(data, dict) else None
+    for rule in rules if isinstance(rules, list) else ():
+        if not isinstance(rule, dict):
+            continue
+        if isinstance(rule.get("status"), str):
+            rule["status"] = rule["status"].strip().lower()
+        if isinstance(rule.get("confidence"), str):
+            try:
+                value = float(rule["confidence"].strip().rstrip("%"))
+            except ValueError:
+                continue  # left for the schema check to reject
+            rule["confidence"] = int(value) if value.is_integer() else value
+    return _VALIDATE(data)
+
+
+def _repair_prompt(raw: str, problem: Exception) -> str:
+    return (
+        f"Fix this JSON to match the schema. Problem: {problem}\n"
+        f"Return only the corrected JSON.\n\nJSON:\n{raw}\n\n"
+        f"Schema:\n{json.dumps(RESULT_SCHEMA)}"
+    )
+
+
+def _clean_page(page) -> Optional[str]:
+    """Returns the cleaned text of one pypdf page, or None if it has no text."""
+    text = page.extract_text()
+    if not text:
+        return None
+    return LegalAgent._clean_text(text)
+
+
+def _extract_page(index: int) -> Optional[str]:
+    """Pool worker: returns the cleaned text of page `index` of the worker's PDF."""
+    return _clean_page(_worker_reader.pages[index])
+
+
+def _parse_partial_json(raw: str) -> Optional[Dict]:
+    """
+    Best-effort parse of a JSON object that is still being streamed.
+    Cuts the text back to the last point where every value is complete and closes
+    the open brackets; returns None if no object can be recovered yet.
+    """
+    start = raw.find("{")
+    if start < 0:
+        return None
+    s = raw[start:]
+
+    stack = []
+    cut = None  # (end index, closing brackets) of the latest safe truncation point
+    in_string = escaped = False
+    for i, ch in enumerate(s):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+            continue
+        if ch == '"':
+            in_string = True
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+            cut = (i + 1, "".join(reversed(stack)))
+        elif ch in "}]":
+            if not stack:
+                break
+            stack.pop()
+            if not stack:
+                cut = (i + 1, "")
+                break
+            cut = (i + 1, "".join(reversed(stack)))
+        elif ch == ",":
+            cut = (i, "".join(reversed(stack)))
+
+    if cut is None:
+        return None
+    end, closers = cut
+    try:
+        return _json_loads(s[:end] + closers)
+    except ValueError:
+        return None
@@ -0,0 +1,14 @@
+from legal_agent import LegalAgent
+
+
+def client_key(agent):
+    return agent.model._client._transport._credentials.token
+
+
+def test_each_agent_keeps_its_own_client():
+    first = LegalAgent("key-one", no_cache=True)
+    second = LegalAgent("key-two", no_cache=True)
+
+    assert first.model._client is not second.model._client
+    assert client_key(first) == "key-one"
+    assert client_key(second) == "key-two"
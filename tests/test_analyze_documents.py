@@ -0,0 +1,80 @@
+import json
+
+from legal_agent import BATCH_MAX_DOCS, LegalAgent
+
+
+def make_result(label):
+    return {
+        "summary": [label],
+        "sections": {
+            key: label for key in (
+                "definitions", "obligations", "responsibilities", "eligibility",
+                "payments", "penalties", "record_keeping",
+            )
+        },
+        "rules_analysis": [
+            {"rule": "Act must define key terms", "status": "pass", "evidence": label, "confidence": 90}
+        ],
+    }
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeModel:
+    """Answers batch prompts with one result per DOCUMENT block, single prompts with one result."""
+
+    def __init__(self, truncate_batches=False):
+        self.truncate_batches = truncate_batches
+        self.prompts = []
+
+    def generate_content(self, prompt):
+        self.prompts.append(prompt)
+        count = prompt.count("DOCUMENT ")
+        if prompt.startswith("DOCUMENT TEXT:"):
+            return FakeResponse(json.dumps(make_result("single")))
+        batch = json.dumps([make_result(f"doc {n}") for n in range(1, count + 1)])
+        return FakeResponse(batch[: len(batch) // 2] if self.truncate_batches else batch)
+
+
+def make_agent(model):
+    agent = LegalAgent("test-key", no_cache=True)
+    agent.model = model
+    return agent
+
+
+def test_batches_are_capped_by_document_count():
+    model = FakeModel()
+    texts = [f"Act number {n}" for n in range(BATCH_MAX_DOCS * 2 + 1)]
+
+    results = make_agent(model).analyze_documents(texts)
+
+    assert len(model.prompts) == 3
+    assert all(p.count("DOCUMENT ") <= BATCH_MAX_DOCS for p in model.prompts)
+    assert [r["summary"] for r in results[:2]] == [["doc 1"], ["doc 2"]]
+
+
+def test_unusable_batch_response_falls_back_per_document():
+    model = FakeModel(truncate_batches=True)
+    texts = ["First Act", "Second Act"]
+
+    results = make_agent(model).analyze_documents(texts)
+
+    assert [r["summary"] for r in results] == [["single"], ["single"]]
+    assert results[0] is not results[1]
+    assert len(model.prompts) == 3
+
+
+def test_batched_documents_get_the_single_document_budget():
+    model = FakeModel()
+    agent = make_agent(model)
+    text = "\n".join(f"{n} Payments\nThe Secretary of State must make a payment of the amount." for n in range(1, 2000))
+
+    agent.analyze_documents([text, "Second Act"])
+    agent.analyze_document(text)
+
+    batch_prompt, single_prompt = model.prompts
+    assert single_prompt.startswith("DOCUMENT TEXT:\n")
+    assert single_prompt[len("DOCUMENT TEXT:\n"):] in batch_prompt
@@ -0,0 +1,60 @@
+import random
+import re
+import sys
+
+from legal_agent import LegalAgent, _DIGIT_CLASS
+
+
+def reference_clean(text):
+    """The original line-by-line implementation of LegalAgent._clean_text."""
+    text = re.sub(r'.*Act \d{4}\s+\(c\.\s*\d+\)', '', text)
+    cleaned_lines = []
+    for line in text.split('\n'):
+        stripped = line.strip()
+        if not stripped:
+            continue
+        if stripped.isdigit():
+            continue
+        if "Crown copyright" in stripped or "Stationery Office" in stripped:
+            continue
+        cleaned_lines.append(line)
+    text = "\n".join(cleaned_lines)
+    return re.sub(r'\n\s*\n', '\n\n', text)
+
+
+def test_removes_headers_page_numbers_and_footers():
+    text = (
+        "Universal Credit Act 2025 (c. 22)\n"
+        "1 Standard allowance\n"
+        "  12  \n"
+        "\n"
+        "© Crown copyright 2025\n"
+        "(1) The Secretary of State must act.\n"
+        "Printed by The Stationery Office Limited\n"
+    )
+    assert LegalAgent._clean_text(text) == "1 Standard allowance\n(1) The Secretary of State must act."
+
+
+def test_drops_superscript_only_lines_like_isdigit():
+    assert LegalAgent._clean_text("Footnote text\n²\n ³¹ \nMore text") == "Footnote text\nMore text"
+
+
+def test_digit_class_matches_str_isdigit():
+    digit = re.compile(_DIGIT_CLASS)
+    mismatches = [
+        hex(cp) for cp in range(sys.maxunicode + 1)
+        if bool(digit.fullmatch(chr(cp))) != chr(cp).isdigit()
+    ]
+    assert mismatches == []
+
+
+def test_matches_reference_implementation_on_random_input():
+    tokens = [
+        "a", "12", "²", "①", " ", "\n", "\n", "\t", "\r", "\x0c", "\xa0",
+        "Crown copyright", "Stationery Office", "Welfare Act 2025 (c. 22)",
+        "Act 2025\n (c. 3)", "x y", "7 ",
+    ]
+    rng = random.Random(0)
+    for _ in range(20000):
+        text = "".join(rng.choice(tokens) for _ in range(rng.randint(0, 15)))
+        assert LegalAgent._clean_text(text) == reference_clean(text), repr(text)
@@ -0,0 +1,44 @@
+import json
+
+from legal_agent import _parse_partial_json
+
+
+RESULT = {
+    "summary": ['Quotes "inside", commas, and {braces}', "Second point"],
+    "sections": {"definitions": "Brackets ] and } in text", "payments": "Step 1\nStep 2"},
+    "rules_analysis": [
+        {"rule": "Act must define key terms", "status": "pass", "evidence": "s. 1", "confidence": 90}
+    ],
+}
+
+
+def test_complete_fenced_json_parses_fully():
+    raw = "```json\n" + json.dumps(RESULT, indent=2) + "\n```"
+    assert _parse_partial_json(raw) == RESULT
+
+
+def test_nothing_recoverable_yet():
+    assert _parse_partial_json("") is None
+    assert _parse_partial_json("```json\n") is None
+
+
+def test_incomplete_string_is_dropped():
+    assert _parse_partial_json('{"summary": ["a", "b') == {"summary": ["a"]}
+
+
+def test_every_prefix_is_a_growing_subset_of_the_result():
+    raw = json.dumps(RESULT, indent=2)
+    seen = []
+    for end in range(len(raw) + 1):
+        partial = _parse_partial_json(raw[:end])
+        if partial is None:
+            continue
+        assert isinstance(partial, dict)
+        assert set(partial) <= set(RESULT)
+        for key, value in partial.items():
+            if isinstance(value, list):
+                # Every element but the last (which may still be filling in) is final.
+                assert value[:-1] == RESULT[key][:max(len(value) - 1, 0)]
+        if not seen or seen[-1] != partial:
+            seen.append(partial)
+    assert seen[-1] == RESULT
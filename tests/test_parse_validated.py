@@ -0,0 +1,84 @@
+import json
+
+from legal_agent import RESULT_SCHEMA, LegalAgent
+
+
+def make_result(status="pass", confidence=90):
+    return {
+        "summary": ["The Act changes Universal Credit."],
+        "sections": {
+            key: "..." for key in (
+                "definitions", "obligations", "responsibilities", "eligibility",
+                "payments", "penalties", "record_keeping",
+            )
+        },
+        "rules_analysis": [
+            {"rule": "Act must define key terms", "status": status, "evidence": "s. 1", "confidence": confidence}
+        ],
+    }
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class ScriptedModel:
+    """Returns the given raw responses in order, recording each prompt."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.prompts = []
+
+    def generate_content(self, prompt):
+        self.prompts.append(prompt)
+        return FakeResponse(self.responses.pop(0))
+
+
+def make_agent(model, **kwargs):
+    agent = LegalAgent("test-key", **kwargs)
+    agent.model = model
+    return agent
+
+
+def test_case_and_numeric_string_differences_need_no_repair():
+    model = ScriptedModel()
+    raw = json.dumps(make_result(status=" PASS", confidence="85"))
+
+    result = make_agent(model, no_cache=True)._parse_validated(raw)
+
+    assert result["rules_analysis"][0]["status"] == "pass"
+    assert result["rules_analysis"][0]["confidence"] == 85
+    assert model.prompts == []
+
+
+def test_invalid_output_is_repaired_once():
+    model = ScriptedModel("```json\n" + json.dumps(make_result()) + "\n```")
+    raw = json.dumps(make_result(status="unclear"))
+
+    result = make_agent(model, no_cache=True)._parse_validated(raw)
+
+    assert result == make_result()
+    (prompt,) = model.prompts
+    assert "unclear" in prompt
+    assert "must be one of" in prompt
+    assert json.dumps(RESULT_SCHEMA) in prompt
+
+
+def test_failed_repair_returns_an_error_after_two_calls():
+    bad = json.dumps(make_result(confidence=250))
+    model = ScriptedModel(bad, bad)
+
+    result = make_agent(model, no_cache=True).analyze_document("Some Act")
+
+    assert set(result) == {"error"}
+    assert len(model.prompts) == 2
+
+
+def test_cached_results_failing_the_schema_are_ignored(tmp_path):
+    agent = make_agent(ScriptedModel(), cache_path=str(tmp_path / "cache.db"))
+    agent.response_cache.put("Valid Act", make_result())
+    agent.response_cache.put("Stale Act", {"summary": "not a list"})
+
+    assert agent._cached_result("Valid Act") == make_result()
+    assert agent._cached_result("Stale Act") is None
@@ -0,0 +1,31 @@
+from legal_agent import ResponseCache
+
+
+def test_put_then_get_round_trips_on_normalized_text(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.db"))
+    result = {"summary": ["point"], "score": 90}
+
+    cache.put("Universal  Credit\nAct", result)
+
+    assert cache.get("universal credit act") == result
+    assert cache.get("Jobseekers Act") is None
+
+
+def test_entries_expire_after_ttl(tmp_path, monkeypatch):
+    cache = ResponseCache(str(tmp_path / "cache.db"), ttl_seconds=60)
+    monkeypatch.setattr("legal_agent.time.time", lambda: 1000.0)
+    cache.put("Act", {"summary": ["point"]})
+
+    monkeypatch.setattr("legal_agent.time.time", lambda: 1059.0)
+    assert cache.get("Act") is not None
+
+    monkeypatch.setattr("legal_agent.time.time", lambda: 1060.0)
+    assert cache.get("Act") is None
+
+
+def test_namespaces_do_not_share_entries(tmp_path):
+    path = str(tmp_path / "cache.db")
+    ResponseCache(path, namespace="old prompt").put("Act", {"summary": ["stale"]})
+
+    assert ResponseCache(path, namespace="new prompt").get("Act") is None
+    assert ResponseCache(path, namespace="old prompt").get("Act") == {"summary": ["stale"]}
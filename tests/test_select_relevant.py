@@ -0,0 +1,46 @@
+from legal_agent import CHARS_PER_TOKEN, LegalAgent
+
+OPENING = "Example Act 2025\nAn Act to make provision about example payments.\n"
+CONTENTS = "CONTENTS\n1 Payments\n2 Penalties\n3 Commencement\n"
+PAYMENTS = "1 Payments\n(1) The Secretary of State must make a payment of the amount calculated.\n" * 3
+CROSS_REF = "section 4(6)(c) of the Welfare Reform Act 2007 applies for the purposes of this section.\n"
+FILLER = "2 Commencement\n" + "This Act comes into force on the day it is passed.\n" * 40
+PENALTIES = "3 Penalties\n(1) A person who fails to keep a record commits an offence.\n"
+
+
+def select(text, budget_chars):
+    return LegalAgent._select_relevant(text, budget_chars // CHARS_PER_TOKEN)
+
+
+def test_short_documents_are_returned_unchanged():
+    text = OPENING + PAYMENTS
+    assert LegalAgent._select_relevant(text) is text
+
+
+def test_keeps_opening_and_relevant_sections_within_budget():
+    text = OPENING + "CONTENTS\n" + "1 Payments\n2 Penalties\n" * 20 + "An Act to make provision.\n" \
+        + PAYMENTS + CROSS_REF + FILLER + PENALTIES
+    budget = 1000
+
+    out = select(text, budget)
+
+    assert len(out) <= budget
+    assert out.startswith("Example Act 2025")
+    assert "1 Payments\n(1)" in out and "3 Penalties" in out
+    assert "2 Commencement" not in out
+    # The table of contents is dropped; the cross-reference stays with its section.
+    assert "2 Penalties" not in out
+    assert CROSS_REF.strip() in out
+
+
+def test_contents_block_is_skipped():
+    text = OPENING + CONTENTS + "An Act to make provision.\n" + PAYMENTS + FILLER
+    out = select(text, 600)
+    assert "CONTENTS" not in out
+    assert len(out) <= 600
+
+
+def test_overlong_opening_is_truncated_to_budget():
+    text = "Preamble words. " * 200 + "\n" + PAYMENTS + FILLER
+    out = select(text, 400)
+    assert out == text[:400]